@@ -9,7 +9,7 @@ from collections import defaultdict
 from pathlib import Path
 from pprint import pprint
 
-from helpers import finalise_test
+from helpers import finalise_test, read_single_scenario_csv
 from menu_helper import SimplishMenu
 
 
@@ -91,8 +91,11 @@ class WriteResult(Action):
         """
         print("Writing result to column", column, ":", result)
         scenario_file = context["scenario_file"]
-        scenario = context["scenario"]
+        # Scenarios have fixed fields, so read every column, including
+        # the unanswered ones left out of context["scenario"]
+        scenario = read_single_scenario_csv(scenario_file)
         scenario[column] = result
+        context["scenario"] = scenario
         print("Scenario is now:", scenario)
         with open(scenario_file, "w") as f:
             writer = csv.DictWriter(f, fieldnames=scenario.keys())
@@ -0,0 +1,276 @@
+"""
+Pack finalised results into segment files.
+
+Each finished test is a directory of small files in results/, after
+many runs listing and opening them gets slow and uses a lot of inodes.
+
+Packing appends each file of a result to a segment in archive/, and
+records where it went in the segment's index csv.  The index is only
+written after the data, so an interrupted pack leaves unused bytes in
+the segment rather than a broken result.
+
+Loose and packed results are read through the same API, see `iter_results`.
+
+$ python archive.py [--compress]
+"""
+
+import argparse
+import csv
+import io
+import os
+import shutil
+import zlib
+from pathlib import Path
+
+INDEX_FIELDS = ["result", "file", "offset", "length", "compression"]
+
+# Start a new segment once the current one is bigger than this.
+DEFAULT_SEGMENT_SIZE = 256 * 1024 * 1024
+
+# Files that are worth compressing.
+COMPRESSIBLE_SUFFIXES = {".log", ".txt"}
+
+
+def get_results_directory():
+    return Path("results")
+
+
+def get_archive_directory():
+    return Path("archive")
+
+
+class Result:
+    """
+    A finalised test result, either a loose directory or packed.
+    """
+
+    name = None
+
+    def files(self):
+        raise NotImplementedError()
+
+    def has_file(self, filename):
+        return filename in self.files()
+
+    def read_bytes(self, filename):
+        raise NotImplementedError()
+
+    def read_text(self, filename):
+        return self.read_bytes(filename).decode("utf-8", errors="replace")
+
+    def open(self, filename):
+        """
+        :return: text file object for filename
+        """
+        return io.StringIO(self.read_text(filename), newline="")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class LooseResult(Result):
+    def __init__(self, path):
+        self.path = Path(path)
+        self.name = self.path.name
+
+    def files(self):
+        return sorted(p.name for p in self.path.iterdir() if p.is_file())
+
+    def has_file(self, filename):
+        return (self.path / filename).is_file()
+
+    def has_subdirectories(self):
+        return any(p.is_dir() for p in self.path.iterdir())
+
+    def read_bytes(self, filename):
+        return (self.path / filename).read_bytes()
+
+    def open(self, filename):
+        return open(self.path / filename, "r", newline="", errors="replace")
+
+
+class PackedResult(Result):
+    def __init__(self, name, segment):
+        self.name = name
+        self.segment = Path(segment)
+        self.entries = {}  # filename: (offset, length, compression)
+
+    def files(self):
+        return sorted(self.entries)
+
+    def has_file(self, filename):
+        return filename in self.entries
+
+    def read_bytes(self, filename):
+        if filename not in self.entries:
+            raise FileNotFoundError(f"{filename} not in packed result {self.name}")
+
+        offset, length, compression = self.entries[filename]
+        with open(self.segment, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+
+        if compression == "zlib":
+            return zlib.decompress(data)
+        if compression:
+            raise ValueError(f"Unknown compression {compression} in {self.segment}")
+        return data
+
+
+def get_segment_index_filename(segment):
+    return Path(segment).with_suffix(".csv")
+
+
+def iter_segments():
+    archive_directory = get_archive_directory()
+    if not archive_directory.is_dir():
+        return
+    yield from sorted(archive_directory.glob("segment-*.pack"))
+
+
+def read_packed_results():
+    """
+    Read the index of every segment.
+
+    :return dict: result name: PackedResult
+    """
+    results = {}
+    for segment in iter_segments():
+        index_file = get_segment_index_filename(segment)
+        if not index_file.is_file():
+            continue
+
+        with open(index_file) as f:
+            for row in csv.DictReader(f):
+                result = results.get(row["result"])
+                if result is None:
+                    result = results[row["result"]] = PackedResult(
+                        row["result"], segment
+                    )
+                result.entries[row["file"]] = (
+                    int(row["offset"]),
+                    int(row["length"]),
+                    row["compression"],
+                )
+    return results
+
+
+def iter_loose_results():
+    results_directory = get_results_directory()
+    if not results_directory.is_dir():
+        return
+
+    for result_directory in sorted(results_directory.iterdir()):
+        if result_directory.is_dir():
+            yield LooseResult(result_directory)
+
+
+def iter_results():
+    """
+    Yield every result, loose results first.
+
+    A result that is both loose and packed is only yielded once, as loose.
+    """
+    loose_names = set()
+    for result in iter_loose_results():
+        loose_names.add(result.name)
+        yield result
+
+    for name, result in sorted(read_packed_results().items()):
+        if name not in loose_names:
+            yield result
+
+
+def _get_writable_segment(segment_size):
+    archive_directory = get_archive_directory()
+    archive_directory.mkdir(parents=True, exist_ok=True)
+
+    segments = list(iter_segments())
+    if segments and segments[-1].stat().st_size < segment_size:
+        return segments[-1]
+
+    number = len(segments) + 1
+    return archive_directory / f"segment-{number:05d}.pack"
+
+
+def pack_result(result, segment, compress=False):
+    """
+    Append the files of a loose result to segment, then its index.
+    """
+    rows = []
+    with open(segment, "ab") as f:
+        for filename in result.files():
+            data = result.read_bytes(filename)
+            compression = ""
+            if compress and Path(filename).suffix in COMPRESSIBLE_SUFFIXES:
+                data = zlib.compress(data)
+                compression = "zlib"
+
+            offset = f.tell()
+            f.write(data)
+            rows.append([result.name, filename, offset, len(data), compression])
+        f.flush()
+        os.fsync(f.fileno())
+
+    index_file = get_segment_index_filename(segment)
+    write_header = not index_file.is_file()
+    with open(index_file, "a", newline="") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(INDEX_FIELDS)
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def pack_results(compress=False, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Pack every loose result that has a scenario.csv, and remove it from results/
+    """
+    packed_results = read_packed_results()
+    count = 0
+    for result in iter_loose_results():
+        if not result.has_file("scenario.csv"):
+            continue
+        if result.has_subdirectories():
+            # Only files are packed, don't lose anything else.
+            print("Result has subdirectories, not packing", result.name)
+            continue
+
+        packed = packed_results.get(result.name)
+        if packed is not None:
+            if packed.files() == result.files():
+                # An earlier pack was interrupted before the loose copy
+                # was removed.
+                print("Already packed, removing loose copy", result.name)
+                shutil.rmtree(result.path)
+            else:
+                print("Packed copy has different files, skipping", result.name)
+            continue
+
+        segment = _get_writable_segment(segment_size)
+        pack_result(result, segment, compress=compress)
+        shutil.rmtree(result.path)
+        count += 1
+
+    print(f"Packed {count} results")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack results into segment files")
+    parser.add_argument(
+        "--compress", action="store_true", help="Compress logs with zlib"
+    )
+    parser.add_argument(
+        "--segment-size",
+        type=int,
+        default=DEFAULT_SEGMENT_SIZE // (1024 * 1024),
+        help="Segment size in MiB",
+    )
+    args = parser.parse_args()
+
+    pack_results(compress=args.compress, segment_size=args.segment_size * 1024 * 1024)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+import csv
+import os
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from actions import camel_case_to_underscore_case
+
+DEFAULT_TIMEOUT = 5.0
+
+
+def read_sysfs_directory(directory):
+    """
+    Read every readable file in a sysfs directory (non-recursive).
+
+    :return: list of (name, value) tuples
+    """
+    values = []
+    directory = Path(directory)
+    if not directory.is_dir():
+        return values
+
+    for path in sorted(directory.iterdir()):
+        if not path.is_file():
+            continue
+        try:
+            values.append((path.name, path.read_text().strip()))
+        except (PermissionError, OSError):
+            # Some attributes are write only, or root only.
+            continue
+    return values
+
+
+def format_values(values):
+    return "".join(f"{name}: {value}\n" for name, value in values)
+
+
+class Collector:
+    """
+    Collectors take a snapshot of some part of system state.
+
+    The snapshot is written to the test directory, and optionally
+    summarised into one of the report columns.
+    """
+
+    # Column in `custom_report_headers` this collector can fill.
+    report_header = None
+
+    def collect(self, timeout):
+        """
+        :param timeout: Seconds the collector has to finish.
+        :return: Text to write to the test directory.
+        """
+        raise NotImplementedError()
+
+    def summarise(self, text):
+        """
+        :return: Value for `report_header`, or None
+        """
+        return None
+
+    def stop(self):
+        """
+        Stop a collector that is still running, if possible.
+        """
+        pass
+
+
+class SysPower(Collector):
+    report_header = "mem_sleep"
+
+    def collect(self, timeout):
+        return format_values(read_sysfs_directory("/sys/power"))
+
+    def summarise(self, text):
+        for line in text.splitlines():
+            name, _, value = line.partition(": ")
+            if name == "mem_sleep":
+                return value
+
+
+class KernelCmdline(Collector):
+    def collect(self, timeout):
+        return Path("/proc/cmdline").read_text()
+
+
+class Dmi(Collector):
+    report_header = "bios_version"
+
+    def collect(self, timeout):
+        return format_values(read_sysfs_directory("/sys/class/dmi/id"))
+
+    def summarise(self, text):
+        for line in text.splitlines():
+            name, _, value = line.partition(": ")
+            if name == "bios_version":
+                return value
+
+
+class FirmwareVersions(Collector):
+    def collect(self, timeout):
+        values = read_sysfs_directory("/sys/class/dmi/id")
+        values = [(k, v) for k, v in values if k.startswith("bios_")]
+        for card in sorted(Path("/sys/class/drm").glob("card[0-9]")):
+            vbios = card / "device" / "vbios_version"
+            if vbios.is_file():
+                values.append((f"{card.name}_vbios_version", vbios.read_text().strip()))
+        return format_values(values)
+
+
+class DriverVersions(Collector):
+    report_header = "kernel"
+
+    MODULES = ["amdgpu", "amd_pmc"]
+
+    def collect(self, timeout):
+        values = [("kernel", os.uname().release)]
+        for module in self.MODULES:
+            for attribute in ("version", "srcversion"):
+                path = Path("/sys/module") / module / attribute
+                if path.is_file():
+                    values.append((f"{module}_{attribute}", path.read_text().strip()))
+        return format_values(values)
+
+    def summarise(self, text):
+        return text.splitlines()[0].partition(": ")[2]
+
+
+class AmdgpuDebugfs(Collector):
+    """
+    debugfs is only readable by root, sudo is run non-interactively so
+    a password prompt can't stall the test.
+    """
+
+    FILES = ["amdgpu_firmware_info", "amdgpu_pm_info"]
+
+    def __init__(self):
+        self.proc = None
+
+    def collect(self, timeout):
+        paths = " ".join(f"/sys/kernel/debug/dri/*/{name}" for name in self.FILES)
+        cmd = ["sudo", "-n", "sh", "-c", f"head -n 1000 {paths}"]
+        self.proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        try:
+            stdout, stderr = self.proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.stop()
+            raise
+        if self.proc.returncode != 0:
+            raise RuntimeError(f"exited with {self.proc.returncode}: {stderr.strip()}")
+        return stdout
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None:
+            # sudo relays SIGTERM to head.
+            self.proc.terminate()
+
+
+COLLECTORS = {
+    camel_case_to_underscore_case(collector.__name__): collector
+    for collector in Collector.__subclasses__()
+}
+
+
+def parse_collectors_file(template_name):
+    """
+    Read the collectors enabled by a template.
+
+    Templates without a collectors.csv don't collect anything.
+
+    :return list: of (name, collector, timeout)
+    """
+    filename = Path("templates") / template_name / "collectors.csv"
+    if not filename.is_file():
+        return []
+
+    collectors = []
+    with open(filename) as f:
+        for row in csv.DictReader(f):
+            name = row["collector"].strip()
+            collector = COLLECTORS.get(name)
+            if not collector:
+                raise ValueError(f"Invalid collector: {name}")
+
+            timeout = float(row.get("timeout") or DEFAULT_TIMEOUT)
+            collectors.append((name, collector(), timeout))
+    return collectors
+
+
+def get_collected_filename(test_directory):
+    return Path(test_directory) / "collected.csv"
+
+
+class CollectorThread(threading.Thread):
+    """
+    Runs one collector as a daemon thread, so a collector stuck in a
+    read can't stop the harness from exiting once its timeout has passed.
+    """
+
+    def __init__(self, name, collector, timeout):
+        super().__init__(name=f"collector-{name}", daemon=True)
+        self.collector = collector
+        self.timeout = timeout
+        self.text = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.text = self.collector.collect(self.timeout)
+        except Exception as e:
+            self.error = e
+
+
+class CollectorRun:
+    """
+    Collectors running in the background for a single test.
+
+    Started before the journal is written, so collection happens
+    alongside it, rather than delaying the s2idle cycle.
+    """
+
+    def __init__(self, test_directory, prefix, collectors):
+        self.test_directory = Path(test_directory)
+        self.prefix = prefix
+        self.started = time.monotonic()
+        self.threads = []
+        for name, collector, timeout in collectors:
+            thread = CollectorThread(name, collector, timeout)
+            thread.start()
+            self.threads.append((name, thread))
+
+    def finish(self, budget=None):
+        """
+        Wait for each collector until its timeout, then write the
+        snapshots and summary.
+
+        :param budget: Seconds to wait in total, collectors still running
+                       after this are stopped.
+        :return dict: report_header: value
+        """
+        summary = {}
+        budget_deadline = None if budget is None else time.monotonic() + budget
+        for name, thread in self.threads:
+            deadline = self.started + thread.timeout
+            if budget_deadline is not None:
+                deadline = min(deadline, budget_deadline)
+            thread.join(max(deadline - time.monotonic(), 0))
+            if thread.is_alive():
+                print(f"Collector {name} did not finish in time, stopping it")
+                thread.collector.stop()
+                continue
+            if thread.error is not None:
+                print(f"Collector {name} failed: {thread.error}")
+                continue
+
+            text = thread.text
+            (self.test_directory / f"{self.prefix}-{name}.txt").write_text(text)
+            collector = thread.collector
+            if collector.report_header:
+                value = collector.summarise(text)
+                if value is not None:
+                    summary[collector.report_header] = value
+
+        if summary:
+            with open(get_collected_filename(self.test_directory), "w") as f:
+                writer = csv.DictWriter(f, fieldnames=summary.keys())
+                writer.writeheader()
+                writer.writerow(summary)
+        return summary
+
+
+def start_collectors(context):
+    config = context["config"]
+    collectors = parse_collectors_file(config.template_name)
+    return CollectorRun(context["test_directory"], context["prefix"], collectors)
@@ -1,12 +1,32 @@
 import dataclasses
 from pathlib import Path
 
+# Columns added to the results report, after the template's columns.
+DEFAULT_REPORT_HEADERS = [
+    "amd_s2idle",
+    "kernel_log",
+    "mem_sleep",
+    "bios_version",
+    "kernel",
+]
+
 
 @dataclasses.dataclass
 class Config:
     template_name: str
-    custom_report_headers: list
+    custom_report_headers: list = dataclasses.field(
+        default_factory=lambda: list(DEFAULT_REPORT_HEADERS)
+    )
     amd_s2idle: Path = Path("~/bin/amd_s2idle.py").expanduser()
+    speech_backend: str = "spd_say"
+    # Seconds collectors may add before the s2idle cycle starts.
+    collector_budget: float = 1
+    # Seconds before a wedged amd_s2idle is stopped, and between each
+    # escalating signal after that.
+    s2idle_timeout: float = 300
+    kill_grace: float = 10
+    # Column in scenario.csv that records a hung or failed s2idle run.
+    hung_column: str = "Resumes?"
 
     def validate(self):
         if not (Path("templates") / self.template_name).is_dir():
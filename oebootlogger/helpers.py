@@ -1,8 +1,11 @@
-from csv import DictReader
+import csv
 from functools import lru_cache
 from pathlib import Path
 from tabulate import tabulate
 
+from results_cache import load_result_columns
+from scenario import read_scenarios
+
 
 @lru_cache(maxsize=1)
 def get_pending_directory():
@@ -24,19 +27,17 @@ def read_scenario_headers(csv_file):
     Return a list of headers.
     """
     with open(csv_file, "r") as f:
-        settings_reader = DictReader(f)
-        return settings_reader.fieldnames
+        return next(csv.reader(f), None)
 
 
 def read_scenario_csv(csv_file):
     """
     Read a csv file holding one or more test scenarios.
 
-    Yield a dictionary for each row in the csv file.
+    Yield a Scenario for each row in the csv file.
     """
     with open(csv_file, "r") as f:
-        settings_reader = DictReader(f)
-        yield from settings_reader
+        yield from read_scenarios(f)
 
 
 def read_concrete_scenario_csv(csv_file):
@@ -44,17 +45,20 @@ def read_concrete_scenario_csv(csv_file):
     Read scenario csv, but only return concrete fields (whose
     key does not contain a question mark).
     """
-    for settings in read_scenario_csv(csv_file):
-        yield {k: v for k, v in settings.items() if "?" not in k}
+    with open(csv_file, "r") as f:
+        yield from read_scenarios(f, concrete=True)
 
 
-def read_single_concrete_scenario_csv(csv_file, raise_on_multiple=True):
+def read_single_scenario_csv(csv_file, raise_on_multiple=True, concrete=False):
     """
     Read a csv file holding a single test scenario.
 
-    Return a dictionary for the row in the csv file.
+    Return a Scenario for the row in the csv file.
     """
-    reader = read_concrete_scenario_csv(csv_file)
+    if concrete:
+        reader = read_concrete_scenario_csv(csv_file)
+    else:
+        reader = read_scenario_csv(csv_file)
     settings = next(reader)
     try:
         next(reader)
@@ -65,10 +69,16 @@ def read_single_concrete_scenario_csv(csv_file, raise_on_multiple=True):
             raise ValueError(
                 f"Expected a single row in {csv_file}, but found more than one"
             )
+    finally:
+        reader.close()
 
     return settings
 
 
+def read_single_concrete_scenario_csv(csv_file, raise_on_multiple=True):
+    return read_single_scenario_csv(csv_file, raise_on_multiple, concrete=True)
+
+
 def finalise_test(context):
     """
     Move test to results directory
@@ -98,29 +108,12 @@ def gather_scenario_results(config):
         Path("templates") / config.template_name / "scenarios.csv"
     )
 
-    headers = expected_headers + extra_headers
-    scenario_data = []
-    if Path("results").is_dir():
-        for result_directory in Path("results").iterdir():
-            scenario_file = result_directory / "scenario.csv"
-            if not scenario_file.is_file():
-                print("no scenario file", scenario_file)
-                continue
-
-            for scenario in read_scenario_csv(scenario_file):
-                if list(scenario.keys()) != expected_headers:
-                    raise ValueError(
-                        f"Unexpected headers in {scenario_file}, expected {expected_headers}, but found {scenario.keys()}"
-                    )
-
-                for extra_header in extra_headers:
-                    scenario.setdefault(extra_header, "")
-
-                scenario_data.append(scenario)
-
-    if not scenario_data:
+    columns = load_result_columns(expected_headers, extra_headers)
+    if not columns:
         print("No scenario results")
         return
 
-    markdown = tabulate(scenario_data, headers={}, tablefmt="github")
+    markdown = tabulate(
+        columns.columns, headers="keys", tablefmt="github", disable_numparse=True
+    )
     print(markdown)
@@ -1,6 +1,8 @@
 import csv
 import datetime
+import json
 import subprocess
+from collections import defaultdict
 
 
 def parse_date(date_str):
@@ -82,4 +84,83 @@ def write_journal_to_path(journal_log_path, boot_ref):
         proc.kill()
 
 
+def format_kernel_entry(entry):
+    """
+    Format a journalctl json entry the same way as `journalctl -k`
+
+    Continuation lines of multi-line messages are indented to line up
+    with the first line of the message, as journalctl does.
+
+    :return: line, without a trailing newline
+    """
+    dt = datetime.datetime.fromtimestamp(int(entry["__REALTIME_TIMESTAMP"]) / 1e6)
+    message = entry.get("MESSAGE") or ""
+    if isinstance(message, list):
+        # Messages that aren't valid utf-8 are output as a list of bytes.
+        message = bytes(message).decode("utf-8", errors="replace")
+    hostname = entry.get("_HOSTNAME", "")
+    prefix = f"{dt.strftime('%b %d %H:%M:%S')} {hostname} kernel: "
+    message = message.rstrip("\n").replace("\n", "\n" + " " * len(prefix))
+    return prefix + message
+
+
+def write_journals_to_paths(targets):
+    """
+    Write the kernel log of several boots, reading the journal only once.
+
+    :param targets: list of (journal_log_path, boot_id, window), window is
+                    None for the whole boot, or a (since, until) tuple of
+                    datetimes, either of which may be None.
+    """
+    if not targets:
+        return
+
+    boot_targets = defaultdict(list)  # boot_id: [(file, since, until)...]
+    files = []
+    try:
+        for journal_log_path, boot_id, window in targets:
+            since, until = window or (None, None)
+            f = journal_log_path.open("w")
+            files.append(f)
+            boot_targets[boot_id].append((f, since, until))
+
+        # Matches on the same field are ORed, so this is every kernel
+        # message from any of the boots.
+        # --all, otherwise json output has null for long messages.
+        cmd = ["journalctl", "-o", "json", "--all", "_TRANSPORT=kernel"]
+        cmd.extend(f"_BOOT_ID={boot_id}" for boot_id in boot_targets)
+
+        windows = [window for _path, _boot_id, window in targets]
+        if all(window and window[0] for window in windows):
+            since = min(window[0] for window in windows)
+            cmd.extend(["--since", since.strftime("%Y-%m-%d %H:%M:%S")])
+        if all(window and window[1] for window in windows):
+            until = max(window[1] for window in windows)
+            cmd.extend(["--until", until.strftime("%Y-%m-%d %H:%M:%S")])
+
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, universal_newlines=True)
+        try:
+            for line in proc.stdout:
+                entry = json.loads(line)
+                outputs = boot_targets.get(entry.get("_BOOT_ID"))
+                if not outputs:
+                    continue
+
+                formatted = None
+                dt = datetime.datetime.fromtimestamp(
+                    int(entry["__REALTIME_TIMESTAMP"]) / 1e6
+                )
+                for f, since, until in outputs:
+                    if since and dt < since or until and dt > until:
+                        continue
+                    if formatted is None:
+                        formatted = format_kernel_entry(entry) + "\n"
+                    f.write(formatted)
+        finally:
+            proc.kill()
+    finally:
+        for f in files:
+            f.close()
+
+
 #
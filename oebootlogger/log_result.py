@@ -13,9 +13,7 @@ def ensure_result_directory(template_name):
 
 
 def main():
-    config = Config(
-        template_name="power", custom_report_headers=["amd_s2idle", "kernel_log"]
-    )
+    config = Config(template_name="power")
 
     ensure_result_directory(config.template_name)
 
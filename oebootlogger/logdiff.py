@@ -0,0 +1,197 @@
+"""
+Show kernel messages that appear in failing runs of a scenario, but
+not in any passing run of the same scenario.
+
+$ python logdiff.py --fail "resumes to black screen" --pass "Resume OK"
+"""
+
+import argparse
+import hashlib
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from tabulate import tabulate
+
+from archive import iter_results
+from config import Config
+from helpers import read_scenario_headers
+from results_cache import load_result_columns
+
+# Parts of a kernel log line that change between runs, with their replacements.
+NORMALISE_PATTERNS = [
+    # journalctl prefix: "Apr 01 17:26:32 hostname kernel: "
+    (re.compile(r"^\w{3} [ \d]\d \d{2}:\d{2}:\d{2} \S+ kernel: "), ""),
+    # dmesg timestamp: "[   12.345678] "
+    (re.compile(r"^\[\s*\d+\.\d+\]\s*"), ""),
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),
+    (re.compile(r"\b[0-9a-fA-F]{8,}\b"), "?"),
+    (re.compile(r"\bpid[:= ]\s*\d+", re.IGNORECASE), "pid ?"),
+    (re.compile(r"\[\d+\]"), "[?]"),
+    # Durations and other measurements.
+    (re.compile(r"\b\d+\.\d+\b"), "?"),
+]
+
+
+def normalise_line(line):
+    line = line.rstrip("\n")
+    for pattern, replacement in NORMALISE_PATTERNS:
+        line = pattern.sub(replacement, line)
+    return line.strip()
+
+
+def hash_line(normalised_line):
+    return hashlib.blake2b(normalised_line.encode(), digest_size=8).digest()
+
+
+def get_journal_filename(result):
+    for filename in result.files():
+        if filename.endswith("-journal-k.log"):
+            return filename
+
+
+def iter_normalised_lines(result):
+    filename = get_journal_filename(result)
+    if filename is None:
+        return
+
+    with result.open(filename) as f:
+        for line in f:
+            normalised = normalise_line(line)
+            if normalised:
+                yield normalised
+
+
+class ScenarioLogs:
+    """
+    Hashes of the kernel messages seen in runs of one scenario.
+
+    Only the text of messages from failing runs is kept, and only once
+    per distinct message.
+    """
+
+    def __init__(self):
+        self.failing_runs = 0
+        self.passing_runs = 0
+        self.failing = Counter()  # hash: number of failing runs
+        self.passing = set()
+        self.text = {}  # hash: normalised line
+
+    def add_failing(self, result):
+        self.failing_runs += 1
+        seen = set()
+        for line in iter_normalised_lines(result):
+            digest = hash_line(line)
+            if digest not in seen:
+                seen.add(digest)
+                self.text.setdefault(digest, line)
+        self.failing.update(seen)
+
+    def add_passing(self, result):
+        self.passing_runs += 1
+        for line in iter_normalised_lines(result):
+            self.passing.add(hash_line(line))
+
+    def regressions(self):
+        """
+        :return: list of (failing run count, message), most common first.
+        """
+        return sorted(
+            (
+                (count, self.text[digest])
+                for digest, count in self.failing.items()
+                if digest not in self.passing
+            ),
+            key=lambda item: (-item[0], item[1]),
+        )
+
+
+def compare_results(config, column, fail_values, pass_values):
+    """
+    Group results by their concrete scenario, and compare the kernel logs
+    of failing and passing runs.
+
+    :return dict: scenario tuple: ScenarioLogs
+    """
+    headers = read_scenario_headers(
+        Path("templates") / config.template_name / "scenarios.csv"
+    )
+    columns = load_result_columns(headers, config.custom_report_headers)
+    concrete_headers = [header for header in headers if "?" not in header]
+    keys = zip(
+        *[
+            [(header, value) for value in columns.column(header)]
+            for header in concrete_headers
+        ]
+    )
+
+    results = {result.name: result for result in iter_results()}
+    scenarios = defaultdict(ScenarioLogs)
+    for name, key, outcome in zip(columns.names, keys, columns.column(column)):
+        if outcome in fail_values:
+            scenarios[key].add_failing(results[name])
+        elif outcome in pass_values:
+            scenarios[key].add_passing(results[name])
+    return scenarios
+
+
+def print_regressions(scenarios):
+    for key, logs in sorted(scenarios.items()):
+        title = ", ".join([f"{k}:{v}" for k, v in key])
+        if not logs.failing_runs or not logs.passing_runs:
+            print(
+                f"{title}: need failing and passing runs, found {logs.failing_runs} failing, {logs.passing_runs} passing"
+            )
+            continue
+
+        regressions = logs.regressions()
+        print(
+            f"\n{title}: {len(regressions)} messages only in failing runs ({logs.failing_runs} failing, {logs.passing_runs} passing)\n"
+        )
+        if regressions:
+            rows = [
+                [f"{count}/{logs.failing_runs}", message]
+                for count, message in regressions
+            ]
+            print(
+                tabulate(rows, headers=["failing runs", "message"], tablefmt="github")
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare kernel logs of failing and passing runs"
+    )
+    parser.add_argument(
+        "--column", default="Resumes?", help="scenario.csv column with the result"
+    )
+    parser.add_argument(
+        "--fail", action="append", required=True, help="Result of a failing run"
+    )
+    parser.add_argument(
+        "--pass",
+        dest="passed",
+        action="append",
+        required=True,
+        help="Result of a passing run",
+    )
+    args = parser.parse_args()
+
+    config = Config(template_name="power")
+    headers = read_scenario_headers(
+        Path("templates") / config.template_name / "scenarios.csv"
+    )
+    known_columns = headers + config.custom_report_headers
+    if args.column not in known_columns:
+        parser.error(f"Unknown column {args.column!r}, expected one of {known_columns}")
+
+    scenarios = compare_results(config, args.column, set(args.fail), set(args.passed))
+    if not scenarios:
+        print("No matching results")
+        return
+
+    print_regressions(scenarios)
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,20 @@ class SimplishMenu:
     def get_hotkeys(cls, item):
         return "".join(re.findall(cls.HOTKEY_REGEX, item)).lower()
 
+    @classmethod
+    def get_spoken_item(cls, item):
+        """
+        Text to read an item aloud, hotkeys first:
+
+        >>> SimplishMenu.get_spoken_item("Screen Was [B]lack")
+        'B. Screen Was Black'
+        """
+        hotkeys = cls.get_hotkeys(item).upper()
+        text = item.replace("[", "").replace("]", "")
+        if not hotkeys:
+            return text
+        return f"{', '.join(hotkeys)}. {text}"
+
     def add_item(self, item):
         hotkeys = self.get_hotkeys(item)
         for hotkey in hotkeys:
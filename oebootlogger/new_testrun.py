@@ -69,9 +69,7 @@ def setup_pending_tests(config):
 
 
 def main():
-    config = Config(
-        template_name="power", custom_report_headers=["amd_s2idle", "kernel_log"]
-    )
+    config = Config(template_name="power")
 
     setup_pending_tests(config)
 
@@ -0,0 +1,155 @@
+import atexit
+import queue
+import shutil
+import subprocess
+import threading
+from functools import lru_cache
+
+from actions import camel_case_to_underscore_case
+
+
+class Backend:
+    """
+    Backends speak or play a single message.
+    """
+
+    def start(self, msg):
+        """
+        Start speaking msg, without waiting for it to finish.
+
+        :return: handle passed to `wait`
+        """
+        raise NotImplementedError()
+
+    def wait(self, handle):
+        """
+        Wait for the message started with `start` to finish.
+        """
+        pass
+
+    def cancel(self):
+        """
+        Stop any message currently being spoken.
+        """
+        pass
+
+    def available(self):
+        return True
+
+
+class SpdSay(Backend):
+    def available(self):
+        return shutil.which("spd-say") is not None
+
+    def start(self, msg):
+        # --wait so that queued messages don't talk over each other.
+        return subprocess.Popen(["spd-say", "--wait", msg])
+
+    def wait(self, handle):
+        handle.wait()
+
+    def cancel(self):
+        subprocess.run(["spd-say", "--cancel"])
+
+
+class Null(Backend):
+    """
+    Keeps messages instead of speaking them, useful for testing.
+    """
+
+    def __init__(self):
+        self.spoken = []
+
+    def start(self, msg):
+        self.spoken.append(msg)
+
+
+# Seconds to wait at exit for queued messages to be spoken.
+CLOSE_TIMEOUT = 10
+
+BACKENDS = {
+    camel_case_to_underscore_case(backend.__name__): backend
+    for backend in Backend.__subclasses__()
+}
+
+
+class Notifier:
+    """
+    Queue messages to be spoken by a background worker, so callers
+    (like the menu) don't wait for speech to finish.
+
+    `cancel` drops everything queued so far, used once the user has
+    answered and the rest of the messages are stale.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.generation = 0
+        # Held while checking generation and starting a message, so
+        # cancel can't miss a message that is about to be spoken.
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        # Errors aren't printed as they happen, as the menu may be on screen.
+        self.errors = []
+        self.worker = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self.worker.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+
+            generation, msg = item
+            try:
+                with self.lock:
+                    if generation != self.generation:
+                        # Cancelled after being queued.
+                        continue
+                    handle = self.backend.start(msg)
+                self.backend.wait(handle)
+            except Exception as e:
+                self.errors.append(f"Could not say {msg!r}: {e}")
+
+    def say(self, msg):
+        self.queue.put((self.generation, msg))
+
+    def cancel(self):
+        with self.lock:
+            self.generation += 1
+            try:
+                self.backend.cancel()
+            except Exception as e:
+                self.errors.append(f"Could not cancel speech: {e}")
+
+    def report_errors(self):
+        """
+        Print errors since the last report, call when the menu isn't shown.
+        """
+        errors, self.errors = self.errors, []
+        if errors:
+            print(f"Speech failed {len(errors)} times, first error: {errors[0]}")
+
+    def close(self, timeout=None):
+        """
+        Let queued messages finish, then stop the worker.
+        """
+        self.queue.put(None)
+        self.worker.join(timeout)
+        self.report_errors()
+
+
+@lru_cache(maxsize=1)
+def get_notifier(backend_name):
+    backend = BACKENDS.get(backend_name)
+    if not backend:
+        raise ValueError(f"Invalid speech backend: {backend_name}")
+    backend = backend()
+    if not backend.available():
+        # Say so once, rather than failing on every message.
+        print(f"Speech backend {backend_name} is not available, not speaking")
+        backend = Null()
+    notifier = Notifier(backend)
+    # Let messages queued just before exit, e.g. "Suspend hung", be spoken.
+    atexit.register(notifier.close, CLOSE_TIMEOUT)
+    return notifier
@@ -0,0 +1,159 @@
+"""
+Column oriented cache of every result's scenario.csv and collected.csv.
+
+Reports and queries can read a single column, without opening each
+result or building a row per result.
+
+Results are cached by name: the cache only reads results it hasn't seen
+before, and drops ones that have been discarded.  scenario.csv and
+collected.csv must not be changed after a test is finalised, or the
+cache will keep the old values; delete runtime/results-columns.json to
+rebuild it.
+"""
+
+import json
+from csv import DictReader
+from pathlib import Path
+
+from archive import iter_results
+from scenario import read_scenarios
+
+
+def get_cache_filename():
+    return Path("runtime") / "results-columns.json"
+
+
+def read_result_scenario_csv(result):
+    """
+    Read scenario.csv from a loose or packed result.
+
+    Yield a Scenario for each row in the csv file.
+    """
+    with result.open("scenario.csv") as f:
+        yield from read_scenarios(f)
+
+
+def read_collected_csv(result):
+    """
+    Read the summary written by the collectors for a result, if any.
+
+    Return a dictionary of report header: value.
+    """
+    if not result.has_file("collected.csv"):
+        return {}
+
+    with result.open("collected.csv") as f:
+        return next(DictReader(f), {})
+
+
+class ResultColumns:
+    """
+    :ivar names: Result name for each row.
+    :ivar columns: header: list of values, one per row.
+    """
+
+    def __init__(self, headers, extra_headers):
+        self.headers = list(headers)
+        self.extra_headers = list(extra_headers)
+        self.names = []
+        self.columns = {header: [] for header in self.headers + self.extra_headers}
+
+    def __len__(self):
+        return len(self.names)
+
+    def column(self, header):
+        return self.columns[header]
+
+    def add_result(self, result):
+        collected = read_collected_csv(result)
+        for scenario in read_result_scenario_csv(result):
+            if list(scenario.keys()) != self.headers:
+                raise ValueError(
+                    f"Unexpected headers in {result}, expected {self.headers}, but found {scenario.keys()}"
+                )
+
+            self.names.append(result.name)
+            for header, value in scenario.items():
+                self.columns[header].append(value)
+            for header in self.extra_headers:
+                self.columns[header].append(collected.get(header, ""))
+
+    def keep_results(self, names):
+        """
+        Drop rows for results that are not in names.
+        """
+        keep = [i for i, name in enumerate(self.names) if name in names]
+        if len(keep) == len(self.names):
+            return
+
+        self.names = [self.names[i] for i in keep]
+        for header, values in self.columns.items():
+            self.columns[header] = [values[i] for i in keep]
+
+    def to_json(self):
+        return {
+            "headers": self.headers,
+            "extra_headers": self.extra_headers,
+            "names": self.names,
+            "columns": self.columns,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        columns = cls(data["headers"], data["extra_headers"])
+        columns.names = data["names"]
+        columns.columns = data["columns"]
+        return columns
+
+
+def _read_cache(headers, extra_headers):
+    cache_file = get_cache_filename()
+    if not cache_file.is_file():
+        return None
+
+    try:
+        columns = ResultColumns.from_json(json.loads(cache_file.read_text()))
+    except (ValueError, KeyError):
+        print("Ignoring invalid results cache", cache_file)
+        return None
+
+    if columns.headers != headers or columns.extra_headers != extra_headers:
+        return None
+    return columns
+
+
+def load_result_columns(headers, extra_headers=()):
+    """
+    Load the results cache, bringing it up to date with results/ and archive/
+
+    :return: ResultColumns
+    """
+    headers = list(headers)
+    extra_headers = list(extra_headers)
+    columns = _read_cache(headers, extra_headers) or ResultColumns(
+        headers, extra_headers
+    )
+
+    cached_names = set(columns.names)
+    current_names = set()
+    changed = False
+    for result in iter_results():
+        if not result.has_file("scenario.csv"):
+            print("no scenario file", result)
+            continue
+
+        current_names.add(result.name)
+        if result.name not in cached_names:
+            columns.add_result(result)
+            changed = True
+
+    if not cached_names <= current_names:
+        columns.keep_results(current_names)
+        changed = True
+
+    if changed:
+        cache_file = get_cache_filename()
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(columns.to_json()))
+
+    return columns
@@ -1,11 +1,11 @@
 import atexit
-import subprocess
 import sys
 from functools import lru_cache
 from pathlib import Path
 from pprint import pprint
 
-from actions import parse_response_file
+from actions import WriteResult, parse_response_file
+from collectors import start_collectors
 from config import Config
 from helpers import (
     tests_are_pending,
@@ -14,8 +14,14 @@ from helpers import (
     read_single_concrete_scenario_csv,
     gather_scenario_results,
 )
-from journal_utils import get_current_boot_id, write_journal_to_path
-from menu_helper import choose_option
+from journal_utils import (
+    get_current_boot_id,
+    write_journal_to_path,
+    write_journals_to_paths,
+)
+from menu_helper import SimplishMenu, choose_option
+from notify import get_notifier
+from supervise import run_supervised
 
 
 def get_next_pending_test():
@@ -65,6 +71,11 @@ def get_prefix(test_directory):
     return (Path(test_directory) / "prefix").read_text()
 
 
+def get_journal_log_path(test_directory):
+    prefix = get_prefix(test_directory)
+    return test_directory / f"{prefix}-journal-k.log"
+
+
 def get_context(test_directory, config):
     boot_id = get_test_boot_id(test_directory)
     prefix = get_prefix(test_directory)
@@ -95,28 +106,48 @@ def run_s2idle(test_directory, config):
     ]
 
     if use_sudo:
-        cmd = ["sudo"] + cmd
+        # Non-interactive, amd_s2idle runs in its own session without a
+        # terminal to prompt for a password on.
+        cmd = ["sudo", "-n"] + cmd
     # print in bright white:
     print("\033[1;37m" + " ".join(cmd) + "\033[0m")
-    subprocess.run(cmd)
+    return run_supervised(
+        cmd,
+        test_directory / f"{prefix}-amd_s2idle.stdout.log",
+        test_directory / f"{prefix}-amd_s2idle.stderr.log",
+        timeout=config.s2idle_timeout,
+        grace=config.kill_grace,
+        use_sudo=use_sudo,
+    )
 
 
-def do_say(msg):
+def do_say(config, msg):
+    """
+    Print msg and queue it to be spoken, without waiting for speech.
+    """
     print(msg)
-    subprocess.run(["spd-say", msg])
+    get_notifier(config.speech_backend).say(msg)
 
 
 def get_user_feedback(config, context, speak=False):
     # TODO
     menu_actions = parse_response_file(config.template_name, context)
     if speak:
-        # TODO - speak the menu
-        do_say("Ready")
+        do_say(config, "Ready")
+        notifier = get_notifier(config.speech_backend)
+        for description in menu_actions.keys():
+            notifier.say(SimplishMenu.get_spoken_item(description))
 
     scenario = read_single_concrete_scenario_csv(context["scenario_file"])
     title = ", ".join([f"{k}:{v}" for k, v in scenario.items()])
 
     option = choose_option(title, menu_actions.keys())
+    if speak:
+        # The user has answered, the rest of the menu is stale.
+        notifier = get_notifier(config.speech_backend)
+        notifier.cancel()
+        notifier.report_errors()
+
     actions = menu_actions.get(option, [])
 
     for action, params in actions:
@@ -125,7 +156,7 @@ def get_user_feedback(config, context, speak=False):
     finalise_test(context)
 
 
-def run_test(test_directory, config):
+def run_test(test_directory, config, journal_written=False):
     # Run the test
     print(f"run_test: {test_directory}")
 
@@ -140,14 +171,47 @@ def run_test(test_directory, config):
     pprint(scenario)
 
     boot_id = context["boot_id"]
+    collection = None
+    if context["is_current_boot"]:
+        # System state is only meaningful for this boot, collect it in the
+        # background while the journal is written.
+        collection = start_collectors(context)
+
     # Gather boot log
     # TODO - don't gather the log if it has already been written and
     #        the size matches.
-    prefix = context["prefix"]
-    write_journal_to_path(test_directory / f"{prefix}-journal-k.log", boot_id)
+    if not journal_written:
+        write_journal_to_path(get_journal_log_path(test_directory), boot_id)
+    if collection is not None:
+        # Don't let collectors overlap with the suspend being tested, or
+        # hold it up for long.
+        collection.finish(budget=config.collector_budget)
+
+    s2idle_result = None
     if context["is_current_boot"]:
         # Run s2idle
-        run_s2idle(test_directory, config)
+        s2idle_result = run_s2idle(test_directory, config)
+
+    if s2idle_result is not None and s2idle_result.hung:
+        # Record the hang and move on, rather than waiting on the user.
+        do_say(config, "Suspend hung")
+        if s2idle_result.survived:
+            print("Warning: amd_s2idle could not be stopped, it is still running")
+        WriteResult().run(context, config.hung_column, "s2idle hung")
+        finalise_test(context)
+        return
+
+    if s2idle_result is not None and s2idle_result.returncode != 0:
+        # No suspend happened (e.g. sudo wanted a password), so there is
+        # nothing for the user to answer.
+        do_say(
+            config, f"Suspend failed, amd_s2idle exited with {s2idle_result.returncode}"
+        )
+        WriteResult().run(
+            context, config.hung_column, f"s2idle failed ({s2idle_result.returncode})"
+        )
+        finalise_test(context)
+        return
 
     # Ask user for test result
     # TODO
@@ -175,17 +239,28 @@ def run_running_tests():
     Run any tests that are currently running.
     """
     running_directory = Path("runtime") / "running"
-    for test_directory in running_directory.iterdir():
-        config = Config(
-            template_name="power", custom_report_headers=["amd_s2idle", "kernel_log"]
-        )
-        run_test(test_directory, config)
+    test_directories = sorted(running_directory.iterdir())
+
+    # Tests may be from several boots, write all of their logs in one
+    # pass over the journal.
+    write_journals_to_paths(
+        [
+            (
+                get_journal_log_path(test_directory),
+                get_test_boot_id(test_directory),
+                None,
+            )
+            for test_directory in test_directories
+        ]
+    )
+
+    for test_directory in test_directories:
+        config = Config(template_name="power")
+        run_test(test_directory, config, journal_written=True)
 
 
 def main():
-    config = Config(
-        template_name="power", custom_report_headers=["amd_s2idle", "kernel_log"]
-    )
+    config = Config(template_name="power")
 
     atexit.register(gather_scenario_results, config)
 
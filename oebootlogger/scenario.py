@@ -0,0 +1,109 @@
+import csv
+from functools import lru_cache
+
+
+class Scenario:
+    """
+    A row of scenario.csv.
+
+    Behaves like a dict with fixed keys, but only stores a list of values,
+    the keys are shared by every row with the same headers, see `scenario_type`.
+    """
+
+    __slots__ = ("_values",)
+
+    fields = ()
+    _index = {}
+
+    def __init__(self, values):
+        self._values = list(values)
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self.fields, self._values))
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        if index is None:
+            return default
+        return self._values[index]
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
+    def __setitem__(self, key, value):
+        if key not in self._index:
+            raise KeyError(f"{key} is not one of {self.fields}")
+        self._values[self._index[key]] = value
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __eq__(self, other):
+        if isinstance(other, Scenario):
+            return self.items() == other.items()
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+
+@lru_cache(maxsize=None)
+def scenario_type(fields):
+    """
+    :param fields: tuple of headers
+    :return: Scenario subclass for rows with those headers
+    """
+    return type(
+        "Scenario",
+        (Scenario,),
+        {
+            "__slots__": (),
+            "fields": fields,
+            "_index": {field: index for index, field in enumerate(fields)},
+        },
+    )
+
+
+def read_scenarios(f, concrete=False):
+    """
+    Read scenarios from an open csv file.
+
+    :param concrete: Only return concrete fields (whose key does not
+                     contain a question mark).
+    Yield a Scenario for each row in the csv file.
+    """
+    reader = csv.reader(f)
+    headers = next(reader, None)
+    if headers is None:
+        return
+
+    if concrete:
+        indices = [i for i, header in enumerate(headers) if "?" not in header]
+    else:
+        indices = list(range(len(headers)))
+    record_type = scenario_type(tuple(headers[i] for i in indices))
+
+    for row in reader:
+        if not row:
+            continue
+        if len(row) > len(headers):
+            raise ValueError(
+                f"Row {reader.line_num} has {len(row)} values, but there are only {len(headers)} headers: {row}"
+            )
+        if len(row) < len(headers):
+            row.extend([None] * (len(headers) - len(row)))
+        yield record_type([row[i] for i in indices])
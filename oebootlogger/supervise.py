@@ -0,0 +1,170 @@
+import dataclasses
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+# Signals sent, in order, to a command that has outlived its timeout.
+ESCALATION_SIGNALS = [signal.SIGINT, signal.SIGTERM, signal.SIGKILL]
+
+
+@dataclasses.dataclass
+class SupervisedResult:
+    # None if the command was still running after SIGKILL.
+    returncode: Optional[int]
+    hung: bool
+    # Part of the command was still running after SIGKILL.
+    survived: bool = False
+
+
+def _stream(source, log_path, echo):
+    """
+    Copy output to log_path as it arrives, and optionally to the terminal.
+
+    Reads whatever is available rather than whole lines, so prompts
+    without a newline are still shown.
+    """
+    with open(log_path, "wb") as f:
+        while chunk := source.read1(4096):
+            f.write(chunk)
+            f.flush()
+            if echo is not None:
+                echo.buffer.write(chunk)
+                echo.buffer.flush()
+
+
+def signal_process_group(pgid, sig, use_sudo=False):
+    """
+    Send sig to every process in the group.
+
+    A group started with sudo is owned by root, so can only be signalled
+    through sudo.
+
+    :return: True if any process in the group was signalled.
+    """
+    if use_sudo:
+        cmd = ["sudo", "-n", "kill", f"-{int(sig)}", "--", f"-{pgid}"]
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return proc.returncode == 0
+
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def process_group_alive(pgid):
+    """
+    Check /proc for processes in the group, ignoring zombies that are
+    only waiting to be reaped.
+
+    Works for root owned processes, which can't be signalled to check.
+    """
+    for stat_file in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            stat = stat_file.read_text()
+        except OSError:
+            # Exited while scanning.
+            continue
+        # Fields after the command, which may contain spaces, are:
+        # state ppid pgrp ...
+        state, _ppid, pgrp = stat.rpartition(")")[2].split()[:3]
+        if int(pgrp) == pgid and state not in ("Z", "X"):
+            return True
+    return False
+
+
+def _wait_for_process_group(proc, pgid, timeout):
+    """
+    :return: True if the whole group exited within timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if proc.poll() is not None and not process_group_alive(pgid):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.2)
+
+
+def _stop_process_group(proc, pgid, grace, use_sudo):
+    """
+    Send each of ESCALATION_SIGNALS to the group until it exits.
+
+    :return: True if part of the group survived SIGKILL.
+    """
+    for sig in ESCALATION_SIGNALS:
+        print(f"Sending {sig.name} to process group {pgid}")
+        signal_process_group(pgid, sig, use_sudo)
+        if _wait_for_process_group(proc, pgid, grace):
+            return False
+
+    print(
+        f"Process group {pgid} is still running after SIGKILL, "
+        "it may be stuck in the kernel"
+    )
+    return True
+
+
+def run_supervised(
+    cmd, stdout_path, stderr_path, timeout, grace=10, echo=True, use_sudo=False
+):
+    """
+    Run an external tool, saving its output, and stop it if it hangs.
+
+    stdout and stderr are written to their paths as they arrive.  If cmd
+    is still running after timeout seconds, each of ESCALATION_SIGNALS is
+    sent in turn to its whole process group, waiting grace seconds between
+    them.  Signalling the group rather than cmd itself also stops the
+    children of sudo, which can't relay SIGKILL.
+
+    cmd runs in its own session, so sudo must not need a password (-n).
+    stdin is left attached so the tool can still ask questions.
+
+    :param use_sudo: cmd runs as root, so signal it through sudo.
+    :return: SupervisedResult
+    """
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True
+    )
+    pgid = proc.pid
+    streams = [
+        threading.Thread(
+            target=_stream,
+            args=(proc.stdout, stdout_path, sys.stdout if echo else None),
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_stream,
+            args=(proc.stderr, stderr_path, sys.stderr if echo else None),
+            daemon=True,
+        ),
+    ]
+    for stream in streams:
+        stream.start()
+
+    hung = False
+    survived = False
+    try:
+        proc.wait(timeout)
+    except subprocess.TimeoutExpired:
+        hung = True
+        print(f"Command did not finish after {timeout}s: {' '.join(cmd)}")
+        survived = _stop_process_group(proc, pgid, grace, use_sudo)
+    except KeyboardInterrupt:
+        # cmd is in its own session so didn't get the Ctrl-C, don't leave
+        # it running unsupervised.
+        print(f"Interrupted, stopping: {' '.join(cmd)}")
+        _stop_process_group(proc, pgid, grace, use_sudo)
+        raise
+
+    for stream in streams:
+        # A child that is stuck in the kernel may keep the pipes open.
+        stream.join(grace)
+
+    return SupervisedResult(returncode=proc.returncode, hung=hung, survived=survived)